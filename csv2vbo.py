@@ -18,18 +18,20 @@
 #
 
 import csv
+import io
 import sys
 
-from abc import ABCMeta
-from collections import OrderedDict
-from decimal import Decimal, ROUND_HALF_UP
-from datetime import datetime, timedelta, time
+from datetime import datetime
 from functools import partial
-from math import ceil
-from itertools import chain
+from math import ceil, floor
+from itertools import chain, islice
+from operator import itemgetter
 
 
 class DataFrame(object):
+	"""Data rows with header, comments, and units. The rows may be an
+	iterator, which allows streaming but can be only traversed once."""
+
 	def __init__(self, head, data, info, units={}):
 		self._head_row = head
 		self._data_rows = data
@@ -54,32 +56,44 @@ class DataFrame(object):
 
 
 class Converter(object):
-	__metaclass__ = ABCMeta
+	# Maps of CSV column names to VBO base types and to user-defined channel
+	# types with their units. The maps are constant for each converter class.
+	_base_map = {}
+	_user_map = {}
 
 	def __init__(self):
-		self._base_map = {}
-		self._user_map = {}
-
+		# Values are converted to floats, which provide more than enough
+		# precision for the few decimal digits stored in a VBO file.
 		self._value_map = {
-			"satellites": lambda v: Decimal(v),
-			"time": lambda v: Decimal(v),
+			"satellites": float,
+			"time": float,
 			# Convert latitude and longitude to angular minutes.
-			"latitude": lambda v: 60 * Decimal(v),
-			"longitude": lambda v: -60 * Decimal(v),
-			"velocity kmh": lambda v: Decimal(v),
-			"heading": lambda v: Decimal(v),
-			"height": lambda v: Decimal(v),
+			"latitude": lambda v: 60.0 * float(v),
+			"longitude": lambda v: -60.0 * float(v),
+			"velocity kmh": float,
+			"heading": float,
+			"height": float,
 			# Frequently used user-defined channels.
-			"LatAcc": lambda v: self._decimal_or_default(v, 0.0),
-			"LongAcc": lambda v: self._decimal_or_default(v, 0.0),
+			"LatAcc": partial(self._float_or_default, default=0.0),
+			"LongAcc": partial(self._float_or_default, default=0.0),
 		}
 
 	@staticmethod
-	def _decimal_or_default(value, default):
+	def _float_or_default(value, default):
+		# Sparse columns contain mostly empty values, which are
+		# cheaper to check for than to handle as an exception.
+		if not value:
+			return float(default)
+
 		try:
-			return Decimal(value)
-		except:
-			return Decimal(default)
+			return float(value)
+		except ValueError:
+			return float(default)
+
+	@staticmethod
+	def _negate(value):
+		# Negate as 0.0 - x so that a zero value is written as +0, not -0.
+		return 0.0 - value
 
 	def base_types(self):
 		"""Returns the list of supported RaceLogic base data types."""
@@ -89,9 +103,9 @@ class Converter(object):
 		"""Returns a dictionary of supported (user-defined) channel types."""
 		return self._user_map
 
-	def recognizes(self, row):
-		"""Checks whether this converter recognizes the header row."""
-		return all([item in row for item in self._base_map.keys()])
+	def recognizes(self, columns):
+		"""Checks whether this converter recognizes the header columns."""
+		return self._base_map.keys() <= columns
 
 	def _map_name(self, csv_name):
 		result = self._base_map.get(csv_name)
@@ -103,34 +117,25 @@ class Converter(object):
 		return result
 
 	def _get_mapper(self, vbo_name):
-		if vbo_name is None:
-			# No mapper is expected in this case.
-			return None
-
 		mapper = self._value_map.get(vbo_name)
 		if mapper is not None:
-			return (vbo_name, mapper)
+			return mapper
 		else:
 			raise Exception(
 				"no mapper for %s in %s" % (vbo_name, type(self).__name__)
 			)
 
-	def _map_value(self, csv_value, mapper):
+	def _map_value(self, csv_value, vbo_name, mapper):
 		try:
-			return mapper[1](csv_value)
+			return mapper(csv_value)
 
 		except Exception as ex:
 			# Warn about the problem, but return something relatively usable.
 			print(
 				"warning: failed to convert '%s' to %s\nexception: %s" %
-				(csv_value, mapper[0], ex), file=sys.stderr
+				(csv_value, vbo_name, ex), file=sys.stderr
 			)
-			return "-0"
-
-	def _map_values(self, csv_values, mappers):
-		for (csv_value, mapper) in zip(csv_values, mappers):
-			if mapper is not None:
-				yield self._map_value(csv_value, mapper)
+			return -0.0
 
 	def _preprocess(self, csv_data):
 		"""Preprocesses CSV data before converting them."""
@@ -153,21 +158,16 @@ class Converter(object):
 		base_row = []
 		if "satellites" not in vbo_head:
 			vbo_head.insert(0, "satellites")
-			base_row.append(Decimal(5))
-
-		# Collect CSV-to-VBO value mappers for supported VBO data types.
-		mappers = [self._get_mapper(name) for name in vbo_names]
+			base_row.append(5.0)
 
-		# Map CSV values to VBO values row by row and eliminate potentially
-		# duplicate adjacent rows resulting from mapping a subset of fields.
-		vbo_rows = []
-		last_row = None
-		for csv_row in csv_data.rows():
-			vbo_row = base_row.copy()
-			vbo_row.extend(self._map_values(csv_row, mappers))
-			if vbo_row != last_row:
-				vbo_rows.append(vbo_row)
-				last_row = vbo_row
+		# Collect CSV-to-VBO value mappers for supported VBO data types
+		# and prepare a getter to pick only the supported CSV columns.
+		keep_indices = [
+			i for (i, name) in enumerate(vbo_names) if name is not None
+		]
+		getter = itemgetter(*keep_indices)
+		keep_names = tuple(vbo_names[i] for i in keep_indices)
+		mappers = tuple(self._get_mapper(name) for name in keep_names)
 
 		# Determine units for user-defined data types.
 		vbo_units = {}
@@ -177,77 +177,110 @@ class Converter(object):
 				if vbo_name in vbo_head:
 					vbo_units[vbo_name] = unit
 
+		# The data rows are converted lazily, as they are consumed.
+		vbo_rows = self._convert_rows(
+			csv_data.rows(), base_row, getter, keep_names, mappers
+		)
+
 		return DataFrame(
 			head=vbo_head, data=vbo_rows,
 			info=csv_data.comments(), units=vbo_units
 		)
 
+	def _convert_rows(self, csv_rows, base_row, getter, vbo_names, mappers):
+		# Map CSV values to VBO values row by row and eliminate potentially
+		# duplicate adjacent rows resulting from mapping a subset of fields.
+		last_values = None
+		last_row = None
+		for csv_row in csv_rows:
+			# Rows with the same supported values map to the same VBO row,
+			# so compare the tuples of values to skip them before mapping.
+			csv_values = getter(csv_row)
+			if csv_values == last_values:
+				continue
+
+			last_values = csv_values
+			try:
+				vbo_row = base_row + [
+					mapper(csv_value)
+					for (csv_value, mapper) in zip(csv_values, mappers)
+				]
+
+			except Exception:
+				# Map the values one by one to warn about the failing ones.
+				vbo_row = base_row + [
+					self._map_value(csv_value, vbo_name, mapper)
+					for (csv_value, vbo_name, mapper)
+						in zip(csv_values, vbo_names, mappers)
+				]
+
+			if vbo_row != last_row:
+				yield vbo_row
+				last_row = vbo_row
+
 
 class RaceChronoConverter(Converter):
 
-	def __init__(self):
-		super(RaceChronoConverter, self).__init__()
-
-		self._base_map = {
-			"Locked satellites": "satellites",
-			"Timestamp (s)": "time",
-			"Latitude (deg)": "latitude",
-			"Longitude (deg)": "longitude",
-			"Speed (kph)": "velocity kmh",
-			"Bearing (deg)": "heading",
-			"Altitude (m)": "height"
-		}
+	_base_map = {
+		"Locked satellites": "satellites",
+		"Timestamp (s)": "time",
+		"Latitude (deg)": "latitude",
+		"Longitude (deg)": "longitude",
+		"Speed (kph)": "velocity kmh",
+		"Bearing (deg)": "heading",
+		"Altitude (m)": "height"
+	}
 
-		self._user_map = {
-			"Lateral Acceleration (G)": ("LatAcc", "m/s2"),
-			"Longitudinal Acceleration (G)": ("LongAcc", "m/s2")
-		}
+	_user_map = {
+		"Lateral Acceleration (G)": ("LatAcc", "m/s2"),
+		"Longitudinal Acceleration (G)": ("LongAcc", "m/s2")
+	}
 
 
 class GTechFanaticConverter(Converter):
 
-	def __init__(self):
-		super(GTechFanaticConverter, self).__init__()
+	_base_map = {
+		"Time(s)": "time",
+		"GPS_Lat": "latitude",
+		"GPS_Lon": "longitude",
+		"Speed(kph)": "velocity kmh",
+		"Heading(deg)": "heading"
+	}
 
-		self._base_map = {
-			"Time(s)": "time",
-			"GPS_Lat": "latitude",
-			"GPS_Lon": "longitude",
-			"Speed(kph)": "velocity kmh",
-			"Heading(deg)": "heading"
-		}
+	_user_map = {
+		"G-Force_Lat(G)": ("LatAcc", "m/s2"),
+		"G-Force_Fwd(G)": ("LongAcc", "m/s2")
+	}
 
-		self._user_map = {
-			"G-Force_Lat(G)": ("LatAcc", "m/s2"),
-			"G-Force_Fwd(G)": ("LongAcc", "m/s2")
-		}
+	def __init__(self):
+		super(GTechFanaticConverter, self).__init__()
 
 		self._value_map.update({
-			"latitude": lambda v: Decimal(v) / 10000,
-			"longitude": lambda v: -Decimal(v) / 10000,
+			"latitude": lambda v: float(v) / 10000,
+			"longitude": lambda v: self._negate(float(v) / 10000),
 			# G-Tech flips the sign on lateral acceleration.
-			"LatAcc": lambda v: -self._decimal_or_default(v, 0.0),
+			"LatAcc": lambda v: self._negate(self._float_or_default(v, 0.0)),
 		})
 
 
 class TrackMasterConverter(Converter):
 
-	def __init__(self):
-		super(TrackMasterConverter, self).__init__()
+	_base_map = {
+		"time=": "time",
+		"latitude=": "latitude",
+		"longitude=": "longitude",
+		"speed=": "velocity kmh",
+		"bearing=": "heading",
+		"altitude=": "height"
+	}
 
-		self._base_map = {
-			"time=": "time",
-			"latitude=": "latitude",
-			"longitude=": "longitude",
-			"speed=": "velocity kmh",
-			"bearing=": "heading",
-			"altitude=": "height"
-		}
+	_user_map = {
+		"lateral_accel=": ("LatAcc", "m/s2"),
+		"accel=": ("LongAcc", "m/s2")
+	}
 
-		self._user_map = {
-			"lateral_accel=": ("LatAcc", "m/s2"),
-			"accel=": ("LongAcc", "m/s2")
-		}
+	def __init__(self):
+		super(TrackMasterConverter, self).__init__()
 
 		self._value_map.update({
 			"time": self._datetime_to_secs,
@@ -255,56 +288,63 @@ class TrackMasterConverter(Converter):
 
 	@staticmethod
 	def _datetime_to_secs(value):
-		full = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
-		# Difference between the date and the start of the corresponding day.
-		delta = full - full.combine(full.date(), time(0, tzinfo=full.tzinfo))
-		return Decimal("%d.%d" % (delta.seconds, delta.microseconds))
+		# The value has the "%Y-%m-%dT%H:%M:%S.%f%z" format, and we only need
+		# the time since the start of the corresponding day. The time fields
+		# are at fixed positions, followed by a variable-length fraction of
+		# a second and the time zone offset. Slicing is much faster than
+		# parsing the whole value with datetime.strptime().
+		tail = value[19:]
+		fraction = tail[:len(tail) - len(tail.lstrip(".0123456789"))]
+		return (
+			int(value[11:13]) * 3600 + int(value[14:16]) * 60 +
+			int(value[17:19]) + float(fraction)
+		)
 
 
 class QStarzConverter(Converter):
 
-	def __init__(self):
-		super(QStarzConverter, self).__init__()
+	_header = frozenset((
+		"VALID", "LOCAL TIME", "MS",
+		"LATITUDE", "N/S", "LONGITUDE", "E/W",
+		"ALTITUDE", "SPEED", "HEADING",
+		"G-X", "G-Y"
+	))
 
-		self._header = [
-			"VALID", "LOCAL TIME", "MS",
-			"LATITUDE", "N/S", "LONGITUDE", "E/W",
-			"ALTITUDE", "SPEED", "HEADING",
-			"G-X", "G-Y"
-		]
+	_base_map = {
+		"VALID": "satellites",
+		"LOCAL TIME MS": "time",
+		"LATITUDE N/S": "latitude",
+		"LONGITUDE E/W": "longitude",
+		"SPEED": "velocity kmh",
+		"HEADING": "heading",
+		"ALTITUDE": "height"
+	}
 
-		self._base_map = {
-			"VALID": "satellites",
-			"LOCAL TIME MS": "time",
-			"LATITUDE N/S": "latitude",
-			"LONGITUDE E/W": "longitude",
-			"SPEED": "velocity kmh",
-			"HEADING": "heading",
-			"ALTITUDE": "height"
-		}
+	_user_map = {
+		"G-X": ("LatAcc", "m/s2"),
+		"G-Y": ("LongAcc", "m/s2"),
+	}
 
-		self._user_map = {
-			"G-X": ("LatAcc", "m/s2"),
-			"G-Y": ("LongAcc", "m/s2"),
-		}
+	def __init__(self):
+		super(QStarzConverter, self).__init__()
 
 		self._value_map.update({
-			"satellites": lambda v: 6 if v == "FIXED" else 0,
+			"satellites": lambda v: 6.0 if v == "FIXED" else 0.0,
 			"time": self._time_to_secs,
 			# QStarz flips the sign on longitudial acceleration.
-			"LongAcc": lambda v: -self._decimal_or_default(v, 0.0),
+			"LongAcc": lambda v: self._negate(self._float_or_default(v, 0.0)),
 		})
 
 	@staticmethod
 	def _time_to_secs(value):
-		full = datetime.strptime(value, "%H:%M:%S.%f")
-		# Difference between the time and start of the corresponding day.
-		delta = full - full.combine(full.date(), time(0, tzinfo=full.tzinfo))
-		return Decimal("%d.%d" % (delta.seconds, delta.microseconds))
+		# The value has the "%H:%M:%S.%f" format. Splitting it into fields
+		# is much faster than parsing it with datetime.strptime().
+		(hours, minutes, seconds) = value.split(":")
+		return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
 
-	def recognizes(self, row):
-		"""Checks whether this converter recognizes the header row."""
-		return all([item in row for item in self._header])
+	def recognizes(self, columns):
+		"""Checks whether this converter recognizes the header columns."""
+		return self._header <= columns
 
 	def _preprocess(self, csv_data):
 		"""Merges the LOCAL TIME and MS, the LATITUDE and N/S, """
@@ -327,162 +367,164 @@ class QStarzConverter(Converter):
 		longitude_ew_index = csv_data.index("E/W")
 
 		# Copy values and merge the necessary fields.
-		new_rows = []
-		for old_row in csv_data.rows():
-			new_row = [old_row[i] for i in col_indices]
+		def _merge_rows(old_rows):
+			for old_row in old_rows:
+				new_row = [old_row[i] for i in col_indices]
 
-			# Merge LOCAL TIME and MS columns
-			new_row.extend(["%s.%s" % (
-				old_row[local_time_index], old_row[local_time_ms_index]
-			)])
+				# Merge LOCAL TIME and MS columns
+				new_row.extend(["%s.%s" % (
+					old_row[local_time_index], old_row[local_time_ms_index]
+				)])
 
-			# Merge LATITUDE and N/S columns, prepending N/S as +/-
-			new_row.extend(["%s%s" % (
-				"+" if old_row[latitude_ns_index] == "N" else "-",
-				old_row[latitude_index]
-			)])
+				# Merge LATITUDE and N/S columns, prepending N/S as +/-
+				new_row.extend(["%s%s" % (
+					"+" if old_row[latitude_ns_index] == "N" else "-",
+					old_row[latitude_index]
+				)])
 
-			# Merge LONGITUDE and E/W columns, prepending E/W as +/-
-			new_row.extend(["%s%s" % (
-				"+" if old_row[longitude_ew_index] == "E" else "-",
-				old_row[longitude_index]
-			)])
+				# Merge LONGITUDE and E/W columns, prepending E/W as +/-
+				new_row.extend(["%s%s" % (
+					"+" if old_row[longitude_ew_index] == "E" else "-",
+					old_row[longitude_index]
+				)])
 
-			new_rows.append(new_row)
+				yield new_row
 
 		# Put together a new data frame with an updated header.
 		new_header = [csv_data.header()[i] for i in col_indices]
 		new_header.extend(["LOCAL TIME MS", "LATITUDE N/S", "LONGITUDE E/W"])
 
 		return DataFrame(
-			head=new_header, data=new_rows,
+			head=new_header, data=_merge_rows(csv_data.rows()),
 			info=csv_data.comments(), units=csv_data.units()
 		)
 
 
-def read_csv(input):
+def read_csv(csv_input):
 	reader = csv.reader(csv_input, delimiter=",", quotechar='"')
 
 	# Filter out empty rows and strip all space around data items.
-	rows = [[x.strip() for x in row] for row in reader if len(row) > 0]
+	strip = str.strip
+	rows = [list(map(strip, row)) for row in reader if len(row) > 0]
 
 	# The header row is the first row with the maximal number of items.
 	head_row = max(rows, key=len)
 
 	# Split the data at the header into info rows and data rows.
 	# Eliminate potentially duplicate header rows from the data rows.
+	# Finding the header requires looking at all the rows, but the data
+	# rows are passed on lazily to avoid building yet another list.
 	head_index = rows.index(head_row)
 	info_rows = rows[0:head_index]
-	data_rows = [row for row in rows[head_index:] if row != head_row]
+	data_rows = (
+		row for row in islice(rows, head_index + 1, None) if row != head_row
+	)
 
 	return DataFrame(head=head_row, data=data_rows, info=info_rows)
 
 
-def find_converter(data):
-	converters = (
-		RaceChronoConverter(),
-		GTechFanaticConverter(),
-		TrackMasterConverter(),
-		QStarzConverter()
-	)
+# The converters keep no state between conversions, so they can be
+# created once and reused for any number of inputs.
+_CONVERTERS = (
+	RaceChronoConverter(),
+	GTechFanaticConverter(),
+	TrackMasterConverter(),
+	QStarzConverter()
+)
+
 
-	for converter in converters:
-		if converter.recognizes(data.header()):
+def find_converter(data):
+	# Look up the header columns in a set instead of a list.
+	columns = frozenset(data.header())
+	for converter in _CONVERTERS:
+		if converter.recognizes(columns):
 			return converter
 
 	return None
 
 
 def interpolate_vbo(vbo_data, resolution):
-	def _interpolate(row_a, row_b, offset, fraction):
-		return [
+	def _interpolate(row_a, deltas, offset, fraction):
+		new_row = [
 			# a + f*(b-a)
-			fraction.fma(val_b - val_a, val_a)
-			if i != time_index else val_a + offset
-			for i, (val_a, val_b) in enumerate(zip(row_a, row_b))
+			val_a + fraction * delta
+			for (val_a, delta) in zip(row_a, deltas)
 		]
+		new_row[time_index] = row_a[time_index] + offset
+		return new_row
 
-	time_index = vbo_data.header().index("time")
-
-	new_rows = []
-	last_row = None
-	for row in vbo_data.rows():
-		next_row = [Decimal(value) for value in row]
-		if last_row is not None:
-			time_diff = next_row[time_index] - last_row[time_index]
-			for step in range(1, ceil(time_diff / resolution)):
-				offset = step * resolution
-				fraction = offset / time_diff
-				new_rows.append(
-					_interpolate(last_row, next_row, offset, fraction)
+	def _interpolate_rows(rows):
+		last_row = None
+		for next_row in rows:
+			if last_row is not None:
+				# Round off binary floating point noise in the difference,
+				# because times of day are large compared to the resolution.
+				time_diff = round(
+					next_row[time_index] - last_row[time_index], 6
 				)
+				steps = ceil(time_diff / resolution)
+				if steps > 1:
+					# The differences between the two rows are the same for
+					# all the intermediate rows, so compute them only once.
+					deltas = [b - a for (a, b) in zip(last_row, next_row)]
+					step_fraction = resolution / time_diff
+					for step in range(1, steps):
+						offset = step * resolution
+						fraction = step * step_fraction
+						yield _interpolate(last_row, deltas, offset, fraction)
+
+			yield next_row
+			last_row = next_row
 
-		new_rows.append(row)
-		last_row = next_row
+	time_index = vbo_data.header().index("time")
+	resolution = float(resolution)
 
 	return DataFrame(
-		head=vbo_data.header(), data=new_rows,
+		head=vbo_data.header(), data=_interpolate_rows(vbo_data.rows()),
 		info=vbo_data.comments(), units=vbo_data.units()
 	)
 
 
-def format_vbo(vbo_data):
+def write_vbo(vbo_data, vbo_output):
 	def _seconds_to_hms(secs):
-		int_secs = int(secs)
-		# Get relative time in seconds (without the fractional part).
-		rel_time = (datetime.min + timedelta(seconds=int_secs)).time()
-		# Round the fractional part to milliseconds.
-		int_msecs = int((secs - int_secs).quantize(
-			# Always round halves up.
-			Decimal("0.01"), rounding=ROUND_HALF_UP
-		).shift(2))
-		return "%s.%02d" % (rel_time.strftime("%H%M%S"), int_msecs)
-
-	vbo_formatters = {
-		"satellites": lambda v: "%03d" % v,
-		"time": _seconds_to_hms,
-		"latitude": lambda v: "%+012.5f" % v,
-		"longitude": lambda v: "%+012.5f" % v,
-		"velocity kmh": lambda v: "%07.3f" % v,
-		"heading": lambda v: "%06.2f" % v,
-		"height": lambda v: "%+09.2f" % v,
-		"LatAcc": lambda v: "%+06.3f" % v,
-		"LongAcc": lambda v: "%+06.3f" % v,
-	}
-
-	# Make sure we have all the formatters we need.
-	formatters = [vbo_formatters.get(name) for name in vbo_data.header()]
-	if None in formatters:
-		raise Exception(
-			"no formatter for %s" % vbo_data.header()[formatters.index(None)]
+		# Round the time to hundredths of a second, always rounding halves
+		# up (after removing binary floating point noise, so that decimal
+		# ties are recognized), and split it into whole seconds and the
+		# fractional part.
+		(int_secs, int_csecs) = divmod(floor(round(secs * 100, 6) + 0.5), 100)
+		# Split the whole seconds into hours, minutes, and seconds of a day.
+		(int_mins, int_secs) = divmod(int_secs, 60)
+		(int_hours, int_mins) = divmod(int_mins, 60)
+		return "%02d%02d%02d.%02d" % (
+			int_hours % 24, int_mins, int_secs, int_csecs
 		)
 
-	# Format all values in all rows.
-	new_rows = [
-		[fmt(val) for (val, fmt) in zip(vbo_row, formatters)]
-		for vbo_row in vbo_data.rows()
-	]
-
-	return DataFrame(
-		head=vbo_data.header(), data=new_rows,
-		info=vbo_data.comments(), units=vbo_data.units()
-	)
-
+	# Output formats of VBO data types. Time is converted to a string first.
+	vbo_formats = {
+		"satellites": "%03d",
+		"time": "%s",
+		"latitude": "%+012.5f",
+		"longitude": "%+012.5f",
+		"velocity kmh": "%07.3f",
+		"heading": "%06.2f",
+		"height": "%+09.2f",
+		"LatAcc": "%+06.3f",
+		"LongAcc": "%+06.3f",
+	}
 
-def write_vbo(vbo_data, vbo_output):
 	# Required base types that make a log useful.
-	base_types = OrderedDict((
-		("satellites", "sats"), ("time", "time"),
-		("latitude", "lat"), ("longitude", "long"),
-	))
+	base_types = {
+		"satellites": "sats", "time": "time",
+		"latitude": "lat", "longitude": "long",
+	}
 
 	# Optional base types that may be provided by a data logger.
-	opt_base_types = OrderedDict((
-		("velocity kmh", "velocity"), ("heading", "heading"),
-		("height", "height"), ("vertical velocity m/s", "vert-vel"),
-		("vertical velocity kmh", "vert-vel"),
-		("yaw rate deg/s", "yaw-calc")
-	))
+	opt_base_types = {
+		"velocity kmh": "velocity", "heading": "heading",
+		"height": "height", "vertical velocity m/s": "vert-vel",
+		"vertical velocity kmh": "vert-vel",
+		"yaw rate deg/s": "yaw-calc"
+	}
 
 	# Add only optional base types provided by the converter.
 	base_types.update((
@@ -490,6 +532,24 @@ def write_vbo(vbo_data, vbo_output):
 			if k in vbo_data.header()
 	))
 
+	# Collect the user-defined channel types.
+	user_types = [x for x in vbo_data.header() if x not in base_types]
+
+	# Determine the output order of VBO data types and prepare a getter
+	# that picks the columns of a VBO data row in that order.
+	out_order = list(base_types.keys()) + user_types
+	indices = dict([(n, i) for (i, n) in enumerate(vbo_data.header())])
+	getter = itemgetter(*[indices[name] for name in out_order])
+
+	# Make sure we have all the formats we need and compose them into
+	# a single format string for a complete data row in output order.
+	formats = [vbo_formats.get(name) for name in out_order]
+	if None in formats:
+		raise Exception("no formatter for %s" % out_order[formats.index(None)])
+
+	row_format = " ".join(formats) + "\r\n"
+	time_pos = out_order.index("time")
+
 	# Curry print() with the output file and MS-DOS line suffix.
 	output = partial(print, file=vbo_output, end="\r\n")
 	output(datetime.now().strftime("File created on %d/%m/%Y at %I:%M:%S %p"))
@@ -498,8 +558,7 @@ def write_vbo(vbo_data, vbo_output):
 	for base_type in base_types.keys():
 		output(base_type)
 
-	# Collect the user-defined channel types and add them to the header.
-	user_types = [x for x in vbo_data.header() if x not in base_types]
+	# Add the user-defined channel types to the header.
 	for user_type in user_types:
 		output(user_type)
 
@@ -524,21 +583,38 @@ def write_vbo(vbo_data, vbo_output):
 	output("\r\n[column names]")
 	output(" ".join(list(base_types.values()) + user_types))
 
-	# Determine the output order of VBO data types and get a map of
-	# indices for getting the appropriate column from a VBO data row.
-	out_order = list(base_types.keys()) + user_types
-	indices = dict([(n, i) for (i, n) in enumerate(vbo_data.header())])
-
+	# Format each data row with a single formatting operation and write
+	# the formatted rows in batches to reduce the per-write overhead.
 	output("\r\n[data]")
+	batch = []
 	for row in vbo_data.rows():
-		out_row = [row[indices.get(name)] for name in out_order]
-		output(" ".join(out_row))
+		out_row = list(getter(row))
+		out_row[time_pos] = _seconds_to_hms(out_row[time_pos])
+		batch.append(row_format % tuple(out_row))
+		if len(batch) >= 4096:
+			vbo_output.write("".join(batch))
+			batch.clear()
+
+	vbo_output.write("".join(batch))
 
 
 ### Read the CSV input, find a suitable converter,
 ### convert the CSV data to VBO data, and write the VBO output.
+### The conversion stages are chained lazily, so that the data rows
+### stream through the pipeline as the VBO output is being written.
 
-with sys.stdin as csv_input:
+# The order of VBO header items relies on dictionaries preserving
+# insertion order, which is guaranteed since Python 3.7.
+if sys.version_info < (3, 7):
+	print ("error: Python 3.7 or newer is required", file=sys.stderr)
+	sys.exit(-1)
+
+# Read the standard input without newline translation, as recommended
+# for the csv module, but otherwise keep the standard input encoding.
+with io.TextIOWrapper(
+	sys.stdin.buffer, encoding=sys.stdin.encoding,
+	errors=sys.stdin.errors, newline=""
+) as csv_input:
 	csv_data = read_csv(csv_input)
 
 converter = find_converter(csv_data)
@@ -546,7 +622,11 @@ if converter is None:
 	print ("error: unable to recognize input format", file=sys.stderr)
 	sys.exit(-1)
 
-vbo_data = interpolate_vbo(converter.convert(csv_data), Decimal("0.10"))
-
-with sys.stdout as vbo_output:
-	write_vbo(format_vbo(vbo_data), vbo_output)
+# Write the standard output through a large buffer and without newline
+# translation, because the VBO output already uses MS-DOS line endings.
+with open(
+	sys.stdout.fileno(), "w", buffering=1 << 20,
+	encoding=sys.stdout.encoding, errors=sys.stdout.errors,
+	newline="", closefd=False
+) as vbo_output:
+	write_vbo(interpolate_vbo(converter.convert(csv_data), 0.1), vbo_output)